@@ -1,7 +1,12 @@
-import json
+import io
+import os
+import zipfile
 import pandas as pd
 import streamlit as st
 
+from trace_loader import TraceSet, dump_signature
+from trace_slice import MANIFEST, load_manifest, slice_dump
+
 st.set_page_config(page_title="Unified Dashboard", layout="wide")
 st.title("🖥️ R10K OOO Processor - Unified Dashboard")
 
@@ -9,31 +14,34 @@ st.title("🖥️ R10K OOO Processor - Unified Dashboard")
 ### Load Files
 ##########################################################
 
-# Load trace function
-def load_trace(path):
-    try:
-        with open(path, encoding="utf-8", errors="ignore") as f:
-            return [json.loads(line) for line in f if line.strip()]
-    except FileNotFoundError:
-        return None
-
-# Load all traces
-# TODO: ADD FILE HERE
-rs_trace = load_trace("dump_files/rs_trace.json")
-rob_trace = load_trace("dump_files/rob_trace.json")
-retire_trace = load_trace("dump_files/retire_trace.json")
-cdb_trace = load_trace("dump_files/cdb_trace.json")
+# Panels: (trace key, icon, title, short name)
+PANELS = [
+    ("RS", "📋", "Reservation Station", "RS"),
+    ("ROB", "🔄", "Reorder Buffer", "ROB"),
+    ("RETIRE", "✅", "Retire Stage", "Retire"),
+    ("CDB", "📡", "Common Data Bus", "CDB"),
+    ("FU", "⚙️", "Functional Units", "FU"),
+]
+
+# Open every trace once per dump; a rewritten dump changes the signature.
+# Only a few recent dumps are kept.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def open_traces(trace_dir, signature):
+    return TraceSet(trace_dir)
+
+# Trace directory: either `dump_files` or a slice bundle exported below
+trace_dir = st.text_input("📂 Trace directory", value=st.session_state.get("trace_dir", "dump_files"))
+st.session_state["trace_dir"] = trace_dir
+manifest = load_manifest(trace_dir)
+if manifest:
+    st.info(f"✂️ Slice bundle: cycles {manifest['start']} – {manifest['end']}")
+
+# Open all traces (records are read per cycle, no full parse)
+traces = open_traces(trace_dir, dump_signature(trace_dir))
 
 # Check if any trace is missing
-missing_traces = []
-if rs_trace is None:
-    missing_traces.append("RS")
-if rob_trace is None:
-    missing_traces.append("ROB")
-if retire_trace is None:
-    missing_traces.append("Retire")
-if cdb_trace is None:
-    missing_traces.append("CDB")
+short_names = {key: short for key, _, _, short in PANELS}
+missing_traces = [short_names[key] for key in traces.missing]
 
 if missing_traces:
     st.warning(f"⚠️ Missing trace files: {', '.join(missing_traces)}")
@@ -46,18 +54,10 @@ if missing_traces:
 if "global_cycle" not in st.session_state:
     st.session_state["global_cycle"] = 0
 
-# Determine max cycle from available traces
-max_cycles = []
-if rs_trace:
-    max_cycles.append(len(rs_trace) - 1)
-if rob_trace:
-    max_cycles.append(len(rob_trace) - 1)
-if retire_trace:
-    max_cycles.append(len(retire_trace) - 1)
-if cdb_trace:
-    max_cycles.append(len(cdb_trace) - 1)
-
-max_cycle = max(max_cycles) if max_cycles else 100
+# Determine max cycle from the tail of each trace file
+max_cycle = traces.max_cycle if traces.max_cycle is not None else 100
+# A bundle whose window starts past the end of the run only holds seed records
+min_cycle = min(manifest["start"], max_cycle) if manifest else 0
 
 # Initialize page-specific cycle
 if "page_cycle_unified" not in st.session_state:
@@ -72,20 +72,56 @@ if sync:
     cycle = st.session_state.get("global_cycle", 0)
 else:
     cycle = st.session_state["page_cycle_unified"]
+cycle = min(max(cycle, min_cycle), max_cycle)
 
 col1, col2, col3 = st.columns([1, 3, 1])
 with col1:
     if st.button("⬅ Prev"):
-        st.session_state["page_cycle_unified"] = max(cycle - 1, 0)
+        st.session_state["page_cycle_unified"] = max(cycle - 1, min_cycle)
 with col2:
-    slider_value = st.slider("Cycle", 0, max_cycle, cycle)
-    # Only update if slider actually changed
-    if slider_value != cycle:
-        st.session_state["page_cycle_unified"] = slider_value
+    # st.slider needs min < max; a single-cycle range has nothing to slide
+    if min_cycle < max_cycle:
+        slider_value = st.slider("Cycle", min_cycle, max_cycle, cycle)
+        # Only update if slider actually changed
+        if slider_value != cycle:
+            st.session_state["page_cycle_unified"] = slider_value
+    else:
+        st.caption(f"Cycle {cycle} (only cycle available)")
 with col3:
     if st.button("➡ Next"):
         st.session_state["page_cycle_unified"] = min(cycle + 1, max_cycle)
 
+##########################################################
+### Slice Export
+##########################################################
+
+# Cut cycles [start, end] out of every trace into a small bundle for sharing
+with st.expander("✂️ Export Cycle Slice"):
+    col1, col2 = st.columns(2)
+    with col1:
+        slice_start = int(st.number_input("Start cycle", min_cycle, max_cycle, cycle))
+    with col2:
+        slice_end = int(st.number_input("End cycle", min_cycle, max_cycle, min(cycle + 200, max_cycle)))
+    slice_dir = st.text_input("Output directory", f"slices/cycles_{slice_start}_{slice_end}")
+
+    if st.button("✂️ Export Slice"):
+        try:
+            result = slice_dump(trace_dir, slice_dir, slice_start, slice_end)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+        else:
+            st.success(f"Wrote {slice_dir} — enter it as Trace directory to open it.")
+            st.json(result["traces"])
+
+            # Same bundle as a zip for sending around
+            bundle_name = os.path.basename(os.path.normpath(slice_dir))
+            buf = io.BytesIO()
+            with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+                for fname in [MANIFEST] + [info["file"] for info in result["traces"].values()]:
+                    zf.write(os.path.join(slice_dir, fname), os.path.join(bundle_name, fname))
+            st.download_button("⬇ Download bundle (.zip)", buf.getvalue(),
+                               file_name=f"{bundle_name}.zip", mime="application/zip")
+
 st.markdown("---")
 
 ##########################################################
@@ -94,28 +130,12 @@ st.markdown("---")
 
 display_mode = st.radio(
     "Display Mode:",
-    ["Tabs (Switch between components)", "Expanders (All visible, collapsible)", "Grid (Compact 2x2)", "Vertical (All stacked)"],
+    ["Tabs (Switch between components)", "Expanders (All visible, collapsible)", "Grid (Compact 2-column)", "Vertical (All stacked)"],
     horizontal=True
 )
 
 st.markdown("---")
 
-##########################################################
-### Data Processing
-##########################################################
-
-# Get current cycle data (use the cycle determined above)
-rs_data = rs_trace[min(cycle, len(rs_trace)-1)].get("RS", []) if rs_trace else []
-rob_data = rob_trace[min(cycle, len(rob_trace)-1)].get("ROB", []) if rob_trace else []
-retire_data = retire_trace[min(cycle, len(retire_trace)-1)].get("RETIRE", []) if retire_trace else []
-cdb_data = cdb_trace[min(cycle, len(cdb_trace)-1)].get("CDB", []) if cdb_trace else []
-
-# Convert to DataFrames
-rs_df = pd.DataFrame(rs_data) if rs_data else pd.DataFrame()
-rob_df = pd.DataFrame(rob_data) if rob_data else pd.DataFrame()
-retire_df = pd.DataFrame(retire_data) if retire_data else pd.DataFrame()
-cdb_df = pd.DataFrame(cdb_data) if cdb_data else pd.DataFrame()
-
 ##########################################################
 ### Data Styling
 ##########################################################
@@ -139,175 +159,66 @@ def highlight_row(row):
     
     return styles
 
-# Apply styling to dataframes
-if not rs_df.empty:
-    rs_df_styled = rs_df.style.apply(highlight_row, axis=1)
-else:
-    rs_df_styled = rs_df
-
-if not rob_df.empty:
-    rob_df_styled = rob_df.style.apply(highlight_row, axis=1)
-else:
-    rob_df_styled = rob_df
-
-if not retire_df.empty:
-    retire_df_styled = retire_df.style.apply(highlight_row, axis=1)
-else:
-    retire_df_styled = retire_df
-
-if not cdb_df.empty:
-    cdb_df_styled = cdb_df.style.apply(highlight_row, axis=1)
-else:
-    cdb_df_styled = cdb_df
-
 ##########################################################
 ### Display Modes
 ##########################################################
 
+# Draw one panel for the current cycle and record its entry count
+entries = {}
+def render_panel(key, height):
+    short = short_names[key]
+    record = traces.record_at(key, cycle)
+    rows = record.get(key, []) if record else []
+    df = pd.DataFrame(rows) if rows else pd.DataFrame()
+    if df.empty:
+        st.info(f"No {short} data available for this cycle")
+    else:
+        st.dataframe(df.style.apply(highlight_row, axis=1), use_container_width=True, height=height)
+    entries[key] = len(df)
+
 # === TABS MODE ===
 if display_mode == "Tabs (Switch between components)":
-    tab1, tab2, tab3, tab4 = st.tabs(["📋 Reservation Station", "🔄 Reorder Buffer", "✅ Retire", "📡 CDB"])
-    
-    with tab1:
-        st.subheader(f"Reservation Station - Cycle {cycle}")
-        if not rs_df.empty:
-            st.dataframe(rs_df_styled, use_container_width=True, height=400)
-        else:
-            st.info("No RS data available for this cycle")
-    
-    with tab2:
-        st.subheader(f"Reorder Buffer - Cycle {cycle}")
-        if not rob_df.empty:
-            st.dataframe(rob_df_styled, use_container_width=True, height=400)
-        else:
-            st.info("No ROB data available for this cycle")
-    
-    with tab3:
-        st.subheader(f"Retire Stage - Cycle {cycle}")
-        if not retire_df.empty:
-            st.dataframe(retire_df_styled, use_container_width=True, height=400)
-        else:
-            st.info("No Retire data available for this cycle")
-    
-    with tab4:
-        st.subheader(f"Common Data Bus - Cycle {cycle}")
-        if not cdb_df.empty:
-            st.dataframe(cdb_df_styled, use_container_width=True, height=400)
-        else:
-            st.info("No CDB data available for this cycle")
+    tabs = st.tabs([f"{icon} {title}" for _, icon, title, _ in PANELS])
+    for (key, _, title, _), tab in zip(PANELS, tabs):
+        with tab:
+            st.subheader(f"{title} - Cycle {cycle}")
+            render_panel(key, 400)
 
 # === EXPANDERS MODE ===
 elif display_mode == "Expanders (All visible, collapsible)":
-    with st.expander("📋 Reservation Station", expanded=True):
-        st.subheader(f"Cycle {cycle}")
-        if not rs_df.empty:
-            st.dataframe(rs_df_styled, use_container_width=True, height=300)
-        else:
-            st.info("No RS data available")
-    
-    with st.expander("🔄 Reorder Buffer", expanded=True):
-        st.subheader(f"Cycle {cycle}")
-        if not rob_df.empty:
-            st.dataframe(rob_df_styled, use_container_width=True, height=300)
-        else:
-            st.info("No ROB data available")
-    
-    with st.expander("✅ Retire Stage", expanded=False):
-        st.subheader(f"Cycle {cycle}")
-        if not retire_df.empty:
-            st.dataframe(retire_df_styled, use_container_width=True, height=300)
-        else:
-            st.info("No Retire data available")
-    
-    with st.expander("📡 Common Data Bus", expanded=False):
-        st.subheader(f"Cycle {cycle}")
-        if not cdb_df.empty:
-            st.dataframe(cdb_df_styled, use_container_width=True, height=300)
-        else:
-            st.info("No CDB data available")
+    for key, icon, title, _ in PANELS:
+        with st.expander(f"{icon} {title}", expanded=key in ("RS", "ROB")):
+            st.subheader(f"Cycle {cycle}")
+            render_panel(key, 300)
 
-# === GRID MODE (2x2) ===
-elif display_mode == "Grid (Compact 2x2)":
+# === GRID MODE (2 columns) ===
+elif display_mode == "Grid (Compact 2-column)":
     col_left, col_right = st.columns(2)
-    
-    with col_left:
-        st.subheader("📋 Reservation Station")
-        if not rs_df.empty:
-            st.dataframe(rs_df_styled, use_container_width=True, height=350)
-        else:
-            st.info("No RS data")
-        
-        st.markdown("---")
-        
-        st.subheader("✅ Retire Stage")
-        if not retire_df.empty:
-            st.dataframe(retire_df_styled, use_container_width=True, height=250)
-        else:
-            st.info("No Retire data")
-    
-    with col_right:
-        st.subheader("🔄 Reorder Buffer")
-        if not rob_df.empty:
-            st.dataframe(rob_df_styled, use_container_width=True, height=350)
-        else:
-            st.info("No ROB data")
-        
-        st.markdown("---")
-        
-        st.subheader("📡 Common Data Bus")
-        if not cdb_df.empty:
-            st.dataframe(cdb_df_styled, use_container_width=True, height=250)
-        else:
-            st.info("No CDB data")
+    for i, (key, icon, title, _) in enumerate(PANELS):
+        with col_left if i % 2 == 0 else col_right:
+            if i >= 2:
+                st.markdown("---")
+            st.subheader(f"{icon} {title}")
+            render_panel(key, 350 if i < 2 else 250)
 
 # === VERTICAL MODE ===
 else:  # Vertical (All stacked)
-    st.subheader("📋 Reservation Station")
-    if not rs_df.empty:
-        st.dataframe(rs_df_styled, use_container_width=True, height=250)
-    else:
-        st.info("No RS data available")
-    
-    st.markdown("---")
-    
-    st.subheader("🔄 Reorder Buffer")
-    if not rob_df.empty:
-        st.dataframe(rob_df_styled, use_container_width=True, height=250)
-    else:
-        st.info("No ROB data available")
-    
-    st.markdown("---")
-    
-    st.subheader("✅ Retire Stage")
-    if not retire_df.empty:
-        st.dataframe(retire_df_styled, use_container_width=True, height=250)
-    else:
-        st.info("No Retire data available")
-    
-    st.markdown("---")
-    
-    st.subheader("📡 Common Data Bus")
-    if not cdb_df.empty:
-        st.dataframe(cdb_df_styled, use_container_width=True, height=250)
-    else:
-        st.info("No CDB data available")
+    for i, (key, icon, title, _) in enumerate(PANELS):
+        if i:
+            st.markdown("---")
+        st.subheader(f"{icon} {title}")
+        render_panel(key, 250)
 
 ##########################################################
 ### Footer
 ##########################################################
 
 st.markdown("---")
-col1, col2, col3, col4, col5, col6 = st.columns(6)
-with col1:
-    st.metric("RS Entries", len(rs_df) if not rs_df.empty else 0)
-with col2:
-    st.metric("ROB Entries", len(rob_df) if not rob_df.empty else 0)
-with col3:
-    st.metric("Retire Entries", len(retire_df) if not retire_df.empty else 0)
-with col4:
-    st.metric("CDB Entries", len(cdb_df) if not cdb_df.empty else 0)
-with col5:
+cols = st.columns(len(PANELS) + 2)
+for col, (key, _, _, short) in zip(cols, PANELS):
+    with col:
+        st.metric(f"{short} Entries", entries[key])
+with cols[-2]:
     st.metric("Current Cycle", cycle)
-with col6:
+with cols[-1]:
     st.metric("Max Cycle", max_cycle)
-
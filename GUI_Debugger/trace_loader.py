@@ -0,0 +1,73 @@
+"""Per-cycle access to all traces in a dump directory without a full scan.
+
+Nothing is parsed up front: the last cycle of each trace is read from the
+file tail, and the record for the displayed cycle is found by binary search
+over byte offsets (see `trace_slice.record_offset`) and parsed as one JSON
+line. Time to first screen is therefore independent of trace size.
+"""
+import json
+import os
+
+from trace_slice import (MANIFEST, TRACE_FILES, last_complete_record, last_cycle,
+                         load_manifest, record_offset)
+
+
+class TraceFile:
+    """Seek-based record lookup in one trace file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def record_at(self, cycle):
+        """Latest record at or before `cycle` (the first record if `cycle` is earlier)."""
+        with open(self.path, "rb") as f:
+            offset = record_offset(f, cycle)
+            if offset is None:
+                return None
+            f.seek(offset)
+            try:
+                return json.loads(f.readline())
+            except ValueError:
+                # Truncated line (e.g. simulation killed mid-dump): show the
+                # last complete snapshot, matching what last_cycle reports
+                rec = last_complete_record(f, offset)
+                return rec[1] if rec else None
+
+
+class TraceSet:
+    """All traces present in `trace_dir`, keyed by trace name."""
+
+    def __init__(self, trace_dir):
+        self.trace_dir = trace_dir
+        self.files = {}
+        self.missing = []
+        # A bundle only vouches for the traces its manifest lists
+        manifest = load_manifest(trace_dir)
+        listed = manifest["traces"] if manifest else TRACE_FILES
+        for name, fname in TRACE_FILES.items():
+            path = os.path.join(trace_dir, fname)
+            if name in listed and os.path.isfile(path):
+                self.files[name] = TraceFile(path)
+            else:
+                self.missing.append(name)
+
+        # Last cycle of each file comes from its tail
+        cycles = [last_cycle(tf.path) for tf in self.files.values()]
+        cycles = [c for c in cycles if c is not None]
+        self.max_cycle = max(cycles) if cycles else None
+
+    def record_at(self, name, cycle):
+        tf = self.files.get(name)
+        return tf.record_at(cycle) if tf else None
+
+
+def dump_signature(trace_dir):
+    """(file, mtime, size) of every trace and manifest in `trace_dir`; changes when a dump is rewritten."""
+    sig = []
+    for fname in [*TRACE_FILES.values(), MANIFEST]:
+        try:
+            stat = os.stat(os.path.join(trace_dir, fname))
+        except FileNotFoundError:
+            continue
+        sig.append((fname, stat.st_mtime_ns, stat.st_size))
+    return tuple(sig)
@@ -0,0 +1,255 @@
+"""Cut a cycle window [start, end] out of every trace in a dump directory.
+
+Each trace is JSONL with one full snapshot per cycle, in increasing cycle
+order (the FU trace also interleaves plain-text marker lines). Slicing
+binary-searches byte offsets to find `start`, then streams forward until
+`end`, so the cost depends on the slice size, not the source file size.
+
+The bundle is a directory with the same file names as `dump_files/` plus a
+`slice.json` manifest, so the dashboard can open it directly. For each trace
+the last snapshot at or before `start` is always included, so cycle `start`
+displays the same state it did in the full run.
+
+CLI:
+    python trace_slice.py dump_files 1200 1400 -o slices/cycles_1200_1400
+"""
+import argparse
+import json
+import os
+import re
+
+# Trace name -> file name inside a dump directory
+TRACE_FILES = {
+    "RS": "rs_trace.json",
+    "ROB": "rob_trace.json",
+    "RETIRE": "retire_trace.json",
+    "CDB": "cdb_trace.json",
+    "FU": "fu_trace.json",
+}
+
+MANIFEST = "slice.json"
+
+# Only look at the head of a line: `{ "cycle": N, ...`
+_CYCLE_RE = re.compile(rb'^\s*\{\s*"cycle"\s*:\s*(\d+)')
+_BACK_BLOCK = 64 * 1024
+
+
+def parse_cycle(line):
+    m = _CYCLE_RE.match(line)
+    return int(m.group(1)) if m else None
+
+
+def _next_record(f, pos):
+    """First record whose line starts at or after `pos`: (start, end, cycle) or None."""
+    if pos > 0:
+        # Step back one byte so a line starting exactly at `pos` is kept
+        f.seek(pos - 1)
+        f.readline()
+    else:
+        f.seek(0)
+    while True:
+        start = f.tell()
+        line = f.readline()
+        if not line:
+            return None
+        cycle = parse_cycle(line)
+        if cycle is not None:
+            return start, f.tell(), cycle
+
+
+def _prev_record(f, pos):
+    """Last record ending at or before `pos` (a line boundary): (start, end, cycle) or None."""
+    begin = pos
+    while begin > 0:
+        begin = max(0, begin - _BACK_BLOCK)
+        f.seek(begin)
+        buf = f.read(pos - begin)
+        lines = buf.split(b"\n")
+        starts, offset = [], begin
+        for line in lines:
+            starts.append(offset)
+            offset += len(line) + 1
+        # lines[0] may be cut off unless we reached the start of the file
+        first = 0 if begin == 0 else 1
+        for i in range(len(lines) - 1, first - 1, -1):
+            cycle = parse_cycle(lines[i])
+            if cycle is not None:
+                return starts[i], min(starts[i] + len(lines[i]) + 1, pos), cycle
+    return None
+
+
+def _size(f):
+    return os.fstat(f.fileno()).st_size
+
+
+def find_offset(f, cycle):
+    """Byte offset of the first record with cycle >= `cycle` (file size if none)."""
+    lo, hi = 0, _size(f)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        rec = _next_record(f, mid)
+        if rec is None or rec[2] >= cycle:
+            hi = mid
+        else:
+            lo = mid + 1
+    rec = _next_record(f, lo)
+    return rec[0] if rec else _size(f)
+
+
+def record_offset(f, cycle):
+    """Offset of the latest record at or before `cycle`.
+
+    Falls back to the first record when `cycle` precedes the whole trace;
+    None if the trace has no records at all.
+    """
+    offset = find_offset(f, cycle + 1)
+    seed = _prev_record(f, offset)
+    if seed:
+        return seed[0]
+    return offset if offset < _size(f) else None
+
+
+def last_complete_record(f, pos):
+    """Last record before `pos` (a line boundary) that parses as JSON.
+
+    Skips truncated lines (e.g. simulation killed mid-dump). Returns
+    (offset, record) or None.
+    """
+    while True:
+        rec = _prev_record(f, pos)
+        if rec is None:
+            return None
+        f.seek(rec[0])
+        try:
+            return rec[0], json.loads(f.readline())
+        except ValueError:
+            pos = rec[0]
+
+
+def last_cycle(path):
+    """Cycle of the last complete record in a trace, read from the file tail (None if empty)."""
+    with open(path, "rb") as f:
+        rec = last_complete_record(f, _size(f))
+    return rec[1].get("cycle") if rec else None
+
+
+def _copy_window(src, dst, start, end):
+    """Stream records for cycles [start, end] (plus the seed) from `src` to `dst`."""
+    count, first = 0, None
+    offset = record_offset(src, start)
+    if offset is None:
+        return count, first
+    src.seek(offset)
+    for line in src:
+        cycle = parse_cycle(line)
+        if cycle is None:
+            continue
+        if cycle > end:
+            break
+        try:
+            json.loads(line)
+        except ValueError:
+            # Truncated line (e.g. simulation killed mid-dump)
+            continue
+        dst.write(line.rstrip(b"\r\n") + b"\n")
+        count += 1
+        if first is None:
+            first = cycle
+    return count, first
+
+
+def slice_trace(src_path, dst_path, start, end):
+    """Copy records for cycles [start, end] plus the seed record before `start`.
+
+    Returns (number of records written, first cycle written or None).
+    """
+    # Write next to the destination and rename, so a failed slice never
+    # leaves a half-written trace behind. A plain open() keeps the normal
+    # umask so teammates can read the bundle.
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+    try:
+        with open(src_path, "rb") as src, open(tmp_path, "xb") as dst:
+            result = _copy_window(src, dst, start, end)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return result
+
+
+def slice_dump(src_dir, dst_dir, start, end):
+    """Slice every trace present in `src_dir` into a bundle at `dst_dir`.
+
+    Returns the manifest dict that is also written to `dst_dir/slice.json`.
+    """
+    if start < 0 or end < start:
+        raise ValueError(f"invalid cycle window [{start}, {end}]")
+    if not os.path.isdir(src_dir):
+        raise ValueError(f"trace directory not found: {src_dir}")
+    present = {name: fname for name, fname in TRACE_FILES.items()
+               if os.path.isfile(os.path.join(src_dir, fname))}
+    if not present:
+        raise ValueError(f"no trace files in {src_dir}")
+    if os.path.realpath(dst_dir) == os.path.realpath(src_dir) or (
+            os.path.isdir(dst_dir) and os.path.samefile(dst_dir, src_dir)):
+        raise ValueError("output directory must differ from the trace directory")
+    # Only ever overwrite an earlier bundle, never a raw dump
+    if os.path.isdir(dst_dir) and not os.path.isfile(os.path.join(dst_dir, MANIFEST)) and any(
+            os.path.isfile(os.path.join(dst_dir, fname)) for fname in TRACE_FILES.values()):
+        raise ValueError(f"{dst_dir} holds trace files but is not a slice bundle")
+    os.makedirs(dst_dir, exist_ok=True)
+
+    # Drop traces left by an earlier bundle that this source doesn't have
+    for name, fname in TRACE_FILES.items():
+        stale = os.path.join(dst_dir, fname)
+        if name not in present and os.path.isfile(stale):
+            os.remove(stale)
+
+    traces = {}
+    for name, fname in present.items():
+        src_path = os.path.join(src_dir, fname)
+        count, first = slice_trace(src_path, os.path.join(dst_dir, fname), start, end)
+        traces[name] = {"file": fname, "records": count, "first_cycle": first}
+
+    manifest = {
+        "source": os.path.basename(os.path.abspath(src_dir)),
+        "start": start,
+        "end": end,
+        "traces": traces,
+    }
+    with open(os.path.join(dst_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(trace_dir):
+    """Return the slice manifest of a bundle, or None for a normal dump directory."""
+    try:
+        with open(os.path.join(trace_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slice cycles [start, end] out of all traces.")
+    parser.add_argument("src", help="dump directory (e.g. dump_files)")
+    parser.add_argument("start", type=int, help="first cycle to keep")
+    parser.add_argument("end", type=int, help="last cycle to keep")
+    parser.add_argument("-o", "--out", help="bundle directory (default: slices/cycles_<start>_<end>)")
+    args = parser.parse_args()
+
+    out = args.out or os.path.join("slices", f"cycles_{args.start}_{args.end}")
+    try:
+        manifest = slice_dump(args.src, out, args.start, args.end)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for name, info in manifest["traces"].items():
+        print(f"{name:<7} {info['records']:>6} records  first cycle {info['first_cycle']}")
+    print(f"Wrote bundle to {out}")
+
+
+if __name__ == "__main__":
+    main()